@@ -33,6 +33,13 @@
 #                               - AuroraDriver send_cmd_with_crc() method now
 #                                 accepts additional arguments
 #                               - refactored calculate_energy()
+#                               - added batch_commands option to send loop
+#                                 data commands to the inverter as a batch
+#                               - syntax now compatible with python 2 and 3
+#                               - isoR (getIsoR) is now converted from Mohms
+#                                 to ohms as intended, previously the
+#                                 conversion was never applied. Existing
+#                                 archived isoResistance data is in Mohms.
 #   9 February 2017     v0.4    - implemented setTime() method
 #   7 February 2017     v0.3    - hex inverter response streams now printed as
 #                                 space separated bytes
@@ -96,6 +103,16 @@ To use:
     # or False, default = False.
     use_inverter_time = False
 
+    # Send the commands used to obtain loop data to the inverter back to back
+    # and then read the responses rather than one command at a time. The
+    # inverter starts replying to the first command while the later commands
+    # are still being sent, so only use this on a full duplex link (eg
+    # RS-232 or 4 wire RS-485/RS-422) or with an adapter that buffers the
+    # commands. Do not use it on a 2 wire half duplex RS-485 bus. If a batch
+    # fails the remaining commands are re-sent one at a time. True or False,
+    # default = False.
+    batch_commands = False
+
     # The driver to use:
     driver = user.aurora
 
@@ -106,7 +123,7 @@ To use:
     # On startup the AuroraDriver derives the aurora readings to use to
     # construct the AuroraDriver loop packets from the aurora readings included
     # in the [[FieldMap]]. All aurora readings included in the [[FieldMap]]
-    # must be a key from the user.aurora.AuroraInverter.commands dict.
+    # must be a key from the user.aurora.COMMANDS dict.
     [[FieldMap]]
         timeDate = getTimeDate
         string1Voltage = getStr1V
@@ -234,7 +251,10 @@ The options can be selected using:
     where option is one of the options listed by --help
 """
 
-from __future__ import with_statement
+from __future__ import print_function
+import binascii
+import collections
+import os.path
 import serial
 import struct
 import syslog
@@ -250,6 +270,29 @@ from weeutil.weeutil import option_as_list, to_bool
 DRIVER_NAME = 'Aurora'
 DRIVER_VERSION = '0.4'
 
+# Struct objects used to assemble the 10 byte command frame sent to the
+# inverter. The first 8 bytes are either the address, command, sub-command and
+# global bytes followed by 4 null pad bytes or the address and command bytes
+# followed by a payload of up to 6 bytes padded with nulls. The last 2 bytes
+# are the CRC, low byte first.
+_CMD_SUB_STRUCT = struct.Struct('4B4x')
+_CMD_STRUCT = struct.Struct('2B6s')
+_CRC_STRUCT = struct.Struct('<H')
+# Struct objects used to decode 4 byte big endian unsigned integers and floats
+# in inverter responses
+_U32_BE = struct.Struct('>I')
+_F32_BE = struct.Struct('>f')
+
+
+# The Aurora CRC16 is the reflected form (polynomial 0x8408) of the CCITT
+# CRC16 (polynomial 0x1021) calculated by binascii.crc_hqx(). A reflected CRC
+# can be calculated with the unreflected algorithm by bit reversing each input
+# byte and then bit reversing the result. _BIT_REVERSE holds the bit reversal
+# of each byte value, _BIT_REVERSE_TRANS is the same table in a form suitable
+# for use with bytearray.translate().
+_BIT_REVERSE = tuple([int('{0:08b}'.format(i)[::-1], 2) for i in range(256)])
+_BIT_REVERSE_TRANS = bytes(bytearray(_BIT_REVERSE))
+
 
 def logmsg(level, msg):
     syslog.syslog(level, 'aurora: %s' % msg)
@@ -259,9 +302,14 @@ def logdbg(msg):
     logmsg(syslog.LOG_DEBUG, msg)
 
 
-def logdbg2(msg):
+def logdbg2(msg, *args):
+    """Log a debug message if debug >= 2.
+
+    Any args are only formatted into msg if the message is to be logged.
+    """
+
     if weewx.debug >= 2:
-        logmsg(syslog.LOG_DEBUG, msg)
+        logmsg(syslog.LOG_DEBUG, msg % args if args else msg)
 
 
 def loginf(msg):
@@ -284,7 +332,7 @@ def confeditor_loader():
 # ============================================================================
 
 
-class DataFormatError(StandardError):
+class DataFormatError(Exception):
     """Exception raised when an error is thrown when processing data being sent
        to or from the inverter."""
 
@@ -518,6 +566,14 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
              64: {'description': 'Jbox fail',         'code': 'W017'}
             }
 
+    # Commands whose responses identify the inverter and do not change for the
+    # life of the driver. Responses to these commands are cached.
+    IMMUTABLE = frozenset(['getPartNumber',
+                           'getVersion',
+                           'getSerialNumber',
+                           'getManufactureDate',
+                           'getFirmwareRelease'])
+
     def __init__(self, aurora_dict):
         """Initialise an object of type AuroroaDriver."""
 
@@ -552,6 +608,9 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
             logdbg('   inverter time will be used to timestamp data')
         else:
             logdbg('   weeWX system time will be used to timestamp data')
+        self.batch_commands = to_bool(aurora_dict.get('batch_commands', False))
+        if self.batch_commands:
+            logdbg('   loop data commands will be sent as a batch')
 
         # get an AuroraInverter object
         self.inverter = AuroraInverter(port,
@@ -559,6 +618,11 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
                                        timeout=timeout,
                                        wait_before_retry=wait_before_retry,
                                        command_delay=command_delay)
+        # cache of responses to IMMUTABLE commands keyed by (command, globall)
+        self._immutable_cache = {}
+        # the readings that make up the DSP data, ie those that use command 59
+        self._dsp_manifest = tuple([k for k, v in COMMANDS.items()
+                                    if v[0] == 59])
         # open up the connection to the inverter
         self.openPort()
 
@@ -572,6 +636,11 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
         # Build the Aurora reading to loop packet field map.
         (self.field_map, self.manifest) = self._build_map_manifest(aurora_dict)
         loginf('self.field_map=%s' % (self.field_map,))
+        # The field map is fixed once we have started so pre-compute the
+        # (dest, src) pairs used to map raw packets as well as those loop
+        # packet fields that need isoR scaling.
+        self._map_items = tuple(self.field_map.items())
+        self._iso_dests = frozenset(d for d, s in self._map_items if s == 'getIsoR')
         # build a 'none' packet to use when the inverter is offline
         self.none_packet = {}
         for src in self.manifest:
@@ -594,33 +663,41 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
         loop packet. Sleep between loop packets.
         """
 
-        while int(time.time()) % self.polling_interval != 0:
-            time.sleep(0.2)
+        # bind the attributes and functions used on every poll to locals
+        _time = time.time
+        _sleep_until_next_tick = self._sleep_until_next_tick
+        _get_raw_packet = self.get_raw_packet
+        _process_raw_packet = self.process_raw_packet
+        _calculate_energy = self.calculate_energy
+        _use_inverter_time = self.use_inverter_time
+        _none_packet = self.none_packet
+
+        _sleep_until_next_tick()
         for count in range(self.max_loop_tries):
             while True:
                 try:
                     # get the current time as timestamp
-                    _ts = int(time.time())
+                    _ts = int(_time())
                     # poll the inverter and obtain raw data
                     logdbg2("genLoopPackets: polling inverter for data")
                     if self.running:
-                        raw_packet = self.get_raw_packet()
+                        raw_packet = _get_raw_packet()
                     else:
                         self.running = self.do_cmd('getState').global_state == 6
                         if self.running:
-                            raw_packet = self.get_raw_packet()
+                            raw_packet = _get_raw_packet()
                         else:
-                            raw_packet = self.none_packet
-                    logdbg2("genLoopPackets: received raw data packet: %s" %
-                                raw_packet)
+                            raw_packet = _none_packet
+                    logdbg2("genLoopPackets: received raw data packet: %s",
+                            raw_packet)
                     # process raw data and return a dict that can be used as a
                     # LOOP packet
-                    packet = self.process_raw_packet(raw_packet)
+                    packet = _process_raw_packet(raw_packet)
                     # add in/set fields that require special consideration
                     if packet:
 
                         # dateTime - either be system time or inverter time
-                        if not self.use_inverter_time:
+                        if not _use_inverter_time:
                             # we are NOT using the inverter timestamp so set
                             # the packet timestamp to the current system time
                             packet['dateTime'] = _ts
@@ -636,31 +713,42 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
                         # dayEnergy is cumulative by day but we need
                         # incremental values so we need to calculate it based
                         # on the last cumulative value
-                        packet['energy'] = self.calculate_energy(packet['dayEnergy'],
-                                                                 self.last_energy)
-                        self.last_energy = packet['dayEnergy'] if 'dayEnergy' in packet else None
+                        _day_energy = packet.get('dayEnergy')
+                        packet['energy'] = _calculate_energy(_day_energy,
+                                                             self.last_energy)
+                        self.last_energy = _day_energy
 
-                        logdbg2("genLoopPackets: received loop packet: %s" %
-                                    packet)
+                        logdbg2("genLoopPackets: received loop packet: %s",
+                                packet)
                         yield packet
                     # wait until its time to poll again
                     logdbg2("genLoopPackets: Sleeping")
-                    while time.time() < _ts + self.polling_interval:
-                        time.sleep(0.2)
-                except IOError, e:
+                    _sleep_until_next_tick()
+                except IOError as e:
                     logerr("LOOP try #%d; error: %s" % (count + 1, e))
                     break
         logerr("LOOP max tries (%d) exceeded." % self.max_loop_tries)
         raise weewx.RetriesExceeded("Max tries exceeded while getting LOOP data.")
 
+    def _sleep_until_next_tick(self):
+        """Sleep until the next multiple of self.polling_interval seconds."""
+
+        _delay = self.polling_interval - time.time() % self.polling_interval
+        if _delay >= 0.001:
+            time.sleep(_delay)
+
     def get_raw_packet(self):
         """Get the raw loop data from the inverter."""
 
         _packet = {}
+        # get the responses for the readings we need, either as a batch or one
+        # reading at a time
+        if self.batch_commands:
+            _responses = self.do_cmd_batch(self.manifest)
+        else:
+            _responses = (self.do_cmd(reading) for reading in self.manifest)
         # iterate over each reading we need to get
-        for reading in self.manifest:
-            # get the reading
-            _response = self.do_cmd(reading)
+        for reading, _response in zip(self.manifest, _responses):
             # If the inverter is running set the running property and save the
             # data. If the inverter is asleep set the running property only,
             # there will be no data.
@@ -685,21 +773,14 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
             A limited weeWX loop packet of mapped raw inverter data.
         """
 
-        # map raw packet readings to loop packet fields using the field map
-        _packet = {}
-        for dest, src in self.field_map.iteritems():
-            if src in raw_packet:
-                _packet[dest] = raw_packet[src]
-                # apply any special processing that may be required
-                if src == 'isoR':
-                    # isoR is reported in Mohms, we want ohms
-                    try:
-                        _packet[dest] *= 1000000.0
-                    except TypeError:
-                        # field is not numeric so leave it
-                        pass
-            else:
-                _packet[dest] = None
+        # map raw packet readings to loop packet fields using the field map,
+        # any field not in the raw packet is set to None
+        _packet = dict((dest, raw_packet.get(src)) for dest, src in self._map_items)
+        # isoR is reported in Mohms, we want ohms
+        for dest in self._iso_dests:
+            _value = _packet[dest]
+            if isinstance(_value, (int, float)):
+                _packet[dest] = _value * 1000000.0
         return _packet
 
     def do_cmd(self, command, payload=None, globall=0):
@@ -707,23 +788,55 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
 
         Inputs:
             command: One of the commands from the command vocabulary of the
-                     AuroraInverter object, AuroraInverter.commands. String.
+                     AuroraInverter object, COMMANDS. String.
             globall: Global (globall=1) or Module (globall=0) measurements.
 
         Returns:
             Response Tuple with the inverters response to the command. If no
             response or response could not be decoded then (None, None, None)
-            is returned.
+            is returned. Responses to IMMUTABLE commands are cached so the
+            inverter is only interrogated once for each.
         """
 
+        _key = (command, globall)
+        if _key in self._immutable_cache:
+            return self._immutable_cache[_key]
         try:
-            return self.inverter.send_cmd_with_crc(command,
-                                                   payload=payload,
-                                                   globall=globall,
-                                                   address=self.address,
-                                                   max_tries=self.max_command_tries)
+            _response = self.inverter.send_cmd_with_crc(command,
+                                                        payload=payload,
+                                                        globall=globall,
+                                                        address=self.address,
+                                                        max_tries=self.max_command_tries)
         except weewx.WeeWxIOError:
             return ResponseTuple(None, None, None)
+        # only cache a response that contains data, otherwise we will try
+        # again next time
+        if command in self.IMMUTABLE and _response.data is not None:
+            self._immutable_cache[_key] = _response
+        return _response
+
+    def do_cmd_batch(self, commands, globall=0):
+        """Send a batch of commands to the inverter and return the responses.
+
+        Inputs:
+            commands: A sequence of commands from the command vocabulary of
+                      the AuroraInverter object, COMMANDS.
+            globall:  Global (globall=1) or Module (globall=0) measurements.
+
+        Returns:
+            A list of Response Tuples with the inverter response to each
+            command in the order the commands were given. If no response was
+            received or the responses could not be decoded then each response
+            is (None, None, None).
+        """
+
+        try:
+            return self.inverter.send_cmd_batch(commands,
+                                                globall=globall,
+                                                address=self.address,
+                                                max_tries=self.max_command_tries)
+        except weewx.WeeWxIOError:
+            return [ResponseTuple(None, None, None)] * len(commands)
 
     def getTime(self):
         """Get inverter system time and return as an epoch timestamp.
@@ -793,12 +906,12 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
                 # something went wrong, it's not fatal but we need to log the
                 # failure and the returned states
                 logerr("Inverter time was not set")
-                logerr("  ***** transmission state=%d (%s)" %
+                logerr("  ***** transmission state=%s (%s)" %
                            (_response.transmission_state,
-                            TRANSMISSION[response_rt.transmission_state]))
-                logerr("  ***** global state=%d (%s)" %
+                            lookup(TRANSMISSION_TBL, _response.transmission_state)))
+                logerr("  ***** global state=%s (%s)" %
                            (_response.global_state,
-                            GLOBAL[response_rt.global_state]))
+                            lookup(GLOBAL_TBL, _response.global_state)))
 
     def get_cumulated_energy(self, period=None):
         """Get 'cumulated' energy readings.
@@ -821,19 +934,25 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
             passed in then None is returned.
         """
 
-        MANIFEST = {'day': 'dayEnergy',
-                    'week': 'weekEnergy',
-                    'month': 'monthEnergy',
-                    'year': 'yearEnergy',
-                    'total': 'totalEnergy',
-                    'partial': 'partialEnergy'}
+        MANIFEST = {'day': 'getDayEnergy',
+                    'week': 'getWeekEnergy',
+                    'month': 'getMonthEnergy',
+                    'year': 'getYearEnergy',
+                    'total': 'getTotalEnergy',
+                    'partial': 'getPartialEnergy'}
 
         _energy = {}
         if period is None:
-            for _period, _reading in MANIFEST.iteritems():
-                _energy[_period] = self.do_cmd(_reading).data
+            _periods = MANIFEST.keys()
+            _readings = [MANIFEST[p] for p in _periods]
+            if self.batch_commands:
+                _responses = self.do_cmd_batch(_readings)
+            else:
+                _responses = [self.do_cmd(_reading) for _reading in _readings]
+            for _period, _response in zip(_periods, _responses):
+                _energy[_period] = _response.data
         elif period in MANIFEST:
-            _energy[period] = self.do_cmd(period).data
+            _energy[period] = self.do_cmd(MANIFEST[period]).data
         else:
             _energy = None
         return _energy
@@ -846,12 +965,8 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
     def get_dsp(self):
         """Get DSP data."""
 
-        manifest = dict((k,v) for k,v in self.inverter.commands.iteritems() if v['cmd'] == 59)
-
-        _dsp = {}
-        for reading, params in manifest.iteritems():
-            _dsp[reading] = self.do_cmd(reading, globall=1).data
-        return _dsp
+        return dict((reading, self.do_cmd(reading, globall=1).data)
+                    for reading in self._dsp_manifest)
 
     @property
     def hardware_name(self):
@@ -903,8 +1018,8 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
         """Build a field map and command manifest.
 
         Build a dict mapping Aurora readings to loop packet fields. Also builds
-        a dict of commands to be used to obtain raw loop data from the
-        inverter.
+        a tuple of the inverter readings to be used to obtain raw loop data
+        from the inverter.
 
         Input:
             inverter_dict: An inverter config dict
@@ -914,21 +1029,54 @@ class AuroraDriver(weewx.drivers.AbstractDevice):
 
             field_map:  A is a dict mapping Aurora readings to loop packet
                         fields.
-            manifest:   A dict of inverter readings and their associated
-                        command parameters to be used as the raw data used as
-                        the basis for a loop packet.
+            manifest:   A tuple of inverter readings to be used as the raw
+                        data used as the basis for a loop packet. Each reading
+                        appears once only even if it is mapped to more than
+                        one loop packet field.
         """
 
-        _manifest = []
-        _field_map = {}
+        _valid = frozenset(COMMANDS)
+        _pairs = []
+        _invalid = []
         _field_map_config = inverter_dict.get('FieldMap')
-        for dest, src in _field_map_config.iteritems():
-            if src in self.inverter.commands:
-                _manifest.append(src)
-                _field_map[dest] = src
+        for dest, src in _field_map_config.items():
+            if src in _valid:
+                _pairs.append((dest, src))
             else:
-                logdbg("Invalid inverter data field '%s' specified in config file. Field ignored." % src)
-        return _field_map, _manifest
+                _invalid.append(src)
+        if _invalid:
+            logdbg("%d invalid inverter data field(s) specified in config file. "
+                   "Field(s) ignored: %s" % (len(_invalid), ', '.join(_invalid)))
+        # remove any duplicate readings, preserving order, so that each
+        # reading is only obtained from the inverter once per loop packet
+        _manifest = tuple(collections.OrderedDict.fromkeys([src for dest, src in _pairs]))
+        if len(_manifest) < len(_pairs):
+            loginf("%d duplicate inverter data field(s) specified in config file. "
+                   "Each field will only be read once." % (len(_pairs) - len(_manifest),))
+        return dict(_pairs), _manifest
+
+
+# ============================================================================
+#                        State code lookup tables
+# ============================================================================
+
+# The AuroraDriver state code dicts are keyed by small non-negative integers so
+# freeze them as tuples indexed by state code with None filling any gaps. Use
+# lookup() to obtain a value from a table.
+
+
+def _freeze(d):
+    """Convert a dict keyed by non-negative integers to an indexed tuple."""
+
+    return tuple([d.get(i) for i in range(max(d) + 1)])
+
+TRANSMISSION_TBL = _freeze(AuroraDriver.TRANSMISSION)
+GLOBAL_TBL = _freeze(AuroraDriver.GLOBAL)
+INVERTER_TBL = _freeze(AuroraDriver.INVERTER)
+DCDC_TBL = _freeze(AuroraDriver.DCDC)
+# ALARM is a dict of dicts so flatten to parallel description and code tables
+ALARM_DESC_TBL = _freeze(dict((k, v['description']) for k, v in AuroraDriver.ALARM.items()))
+ALARM_CODE_TBL = _freeze(dict((k, v['code']) for k, v in AuroraDriver.ALARM.items()))
 
 
 # ============================================================================
@@ -950,51 +1098,13 @@ class AuroraInverter(object):
         self.timeout = timeout
         self.wait_before_retry = wait_before_retry
         self.command_delay = command_delay
-        # Commands that I know to obtain readings from the Aurora inverter.
-        # Listed against each command is the command and sub-command codes and
-        # applicable decode function.
-        self.commands = {
-            'getState':           {'cmd': 50, 'sub':  None, 'fn': self._dec_state},
-            'getPartNumber':      {'cmd': 52, 'sub':  None, 'fn': self._dec_ascii},
-            'getVersion':         {'cmd': 58, 'sub':  None, 'fn': self._dec_ascii_and_state},
-            'getGridV':           {'cmd': 59, 'sub':  1,    'fn': self._dec_float},
-            'getGridC':           {'cmd': 59, 'sub':  2,    'fn': self._dec_float},
-            'getGridP':           {'cmd': 59, 'sub':  3,    'fn': self._dec_float},
-            'getFrequency':       {'cmd': 59, 'sub':  4,    'fn': self._dec_float},
-            'getBulkV':           {'cmd': 59, 'sub':  5,    'fn': self._dec_float},
-            'getLeakDcC':         {'cmd': 59, 'sub':  6,    'fn': self._dec_float},
-            'getLeakC':           {'cmd': 59, 'sub':  7,    'fn': self._dec_float},
-            'getStr1P':           {'cmd': 59, 'sub':  8,    'fn': self._dec_float},
-            'getStr2P':           {'cmd': 59, 'sub':  9,    'fn': self._dec_float},
-            'getInverterT':       {'cmd': 59, 'sub': 21,    'fn': self._dec_float},
-            'getBoosterT':        {'cmd': 59, 'sub': 22,    'fn': self._dec_float},
-            'getStr1V':           {'cmd': 59, 'sub': 23,    'fn': self._dec_float},
-            'getStr1C':           {'cmd': 59, 'sub': 25,    'fn': self._dec_float},
-            'getStr2V':           {'cmd': 59, 'sub': 26,    'fn': self._dec_float},
-            'getStr2C':           {'cmd': 59, 'sub': 27,    'fn': self._dec_float},
-            'getGridDcV':         {'cmd': 59, 'sub': 28,    'fn': self._dec_float},
-            'getGridDcFreq':      {'cmd': 59, 'sub': 29,    'fn': self._dec_float},
-            'getIsoR':            {'cmd': 59, 'sub': 30,    'fn': self._dec_float},
-            'getBulkDcV':         {'cmd': 59, 'sub': 31,    'fn': self._dec_float},
-            'getGridAvV':         {'cmd': 59, 'sub': 32,    'fn': self._dec_float},
-            'getBulkMidV':        {'cmd': 59, 'sub': 33,    'fn': self._dec_float},
-            'getGridNV':          {'cmd': 59, 'sub': 34,    'fn': self._dec_float},
-            'getDayPeakP':        {'cmd': 59, 'sub': 35,    'fn': self._dec_float},
-            'getPeakP':           {'cmd': 59, 'sub': 36,    'fn': self._dec_float},
-            'getGridNPhV':        {'cmd': 59, 'sub': 38,    'fn': self._dec_float},
-            'getSerialNumber':    {'cmd': 63, 'sub':  None, 'fn': self._dec_ascii},
-            'getManufactureDate': {'cmd': 65, 'sub':  None, 'fn': self._dec_week_year},
-            'getTimeDate':        {'cmd': 70, 'sub':  None, 'fn': self._dec_ts},
-            'setTimeDate':        {'cmd': 71, 'sub':  None, 'fn': self._dec_raw},
-            'getFirmwareRelease': {'cmd': 72, 'sub':  None, 'fn': self._dec_ascii_and_state},
-            'getDayEnergy':       {'cmd': 78, 'sub':  0,    'fn': self._dec_int},
-            'getWeekEnergy':      {'cmd': 78, 'sub':  1,    'fn': self._dec_int},
-            'getMonthEnergy':     {'cmd': 78, 'sub':  3,    'fn': self._dec_int},
-            'getYearEnergy':      {'cmd': 78, 'sub':  4,    'fn': self._dec_int},
-            'getTotalEnergy':     {'cmd': 78, 'sub':  5,    'fn': self._dec_int},
-            'getPartialEnergy':   {'cmd': 78, 'sub':  6,    'fn': self._dec_int},
-            'getLastAlarms':      {'cmd': 86, 'sub':  None, 'fn': self._dec_alarms}
-        }
+        # every command is 10 bytes so use a single buffer for assembling
+        # commands
+        self._tx_buf = bytearray(10)
+        # cache of assembled commands keyed by (command, address, globall)
+        self._frame_cache = {}
+        # time the last response was read from the inverter
+        self._last_read_ts = 0
 
     def open_port(self):
         """Open a serial port."""
@@ -1004,13 +1114,53 @@ class AuroraInverter(object):
         logdbg("Opened serial port %s; baud %d; timeout %.2f" % (self.port,
                                                                  self.baudrate,
                                                                  self.timeout))
+        self.set_low_latency()
+
+    def set_low_latency(self):
+        """Minimise the latency of a USB-serial port.
+
+        USB-serial adapters (eg FTDI) buffer received data for up to the
+        adapter latency timer period (default 16ms) before passing it on. As
+        each inverter response is only 8 bytes this is dead time added to
+        every command. If the port is a USB-serial port set the latency timer
+        to 1ms and ask the kernel to use low latency mode. This is best effort
+        only, any failure (eg not Linux, not a USB-serial port or insufficient
+        permissions) is ignored.
+        """
+
+        # the latency timer is exposed via sysfs, the port may be a symlink
+        # (eg /dev/serial/by-id/...) so resolve it first
+        _tty = os.path.basename(os.path.realpath(self.port))
+        _path = '/sys/bus/usb-serial/devices/%s/latency_timer' % _tty
+        try:
+            with open(_path) as f:
+                _before = f.read().strip()
+            # the port is re-opened each time it is cycled, only write and log
+            # the latency timer if it is not already set
+            if _before != '1':
+                with open(_path, 'w') as f:
+                    f.write('1')
+                with open(_path) as f:
+                    _after = f.read().strip()
+                if _after != _before:
+                    loginf("USB-serial latency timer for %s changed from %sms to %sms" % (_tty,
+                                                                                          _before,
+                                                                                          _after))
+        except (IOError, OSError):
+            pass
+        # pyserial 3.1 and later can set ASYNC_LOW_LATENCY on Linux, other
+        # platforms raise NotImplementedError
+        try:
+            self.serial_port.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, ValueError, IOError, OSError):
+            pass
 
     def close_port(self):
         """Close a serial port."""
 
         try:
             # This will cancel any pending loop:
-            self.write('\n')
+            self.write(b'\n')
         except:
             pass
         self.serial_port.close()
@@ -1028,7 +1178,7 @@ class AuroraInverter(object):
 
         try:
             N = self.serial_port.write(data)
-        except serial.serialutil.SerialException, e:
+        except serial.serialutil.SerialException as e:
             logerr("SerialException on write.")
             logerr("  ***** %s" % e)
             # re-raise as a weeWX error I/O error:
@@ -1049,24 +1199,61 @@ class AuroraInverter(object):
             bytes: The number of bytes to be read.
 
         Returns:
-            A string of length bytes containing the data read from the
-            inverter.
+            A bytearray of length bytes containing the data read from the
+            inverter. Indexing a bytearray gives an integer under both python
+            2 and python 3.
         """
 
         try:
             _buffer = self.serial_port.read(bytes)
-        except serial.serialutil.SerialException, e:
+        except serial.serialutil.SerialException as e:
             logerr("SerialException on read.")
             logerr("  ***** %s" % e)
             logerr("  ***** Is there a competing process running??")
             raise
             # re-raise as a weeWX error I/O error:
             raise weewx.WeeWxIOError(e)
+        self._last_read_ts = time.time()
         N = len(_buffer)
         if N != bytes:
             raise weewx.WeeWxIOError("Expected to read %d bytes; got %d instead" %
                                          (bytes, N))
-        return _buffer
+        return bytearray(_buffer)
+
+    def drain_input(self):
+        """Discard any data still being received from the inverter.
+
+        Flushing the input buffer only discards data that has already arrived,
+        if the inverter is still responding to earlier commands those
+        responses would be read as the response to the next command. So read
+        and discard data until the port times out with nothing received then
+        reset the input buffer.
+        """
+
+        try:
+            while self.serial_port.read(64):
+                pass
+            # pyserial 3.0 renamed flushInput() to reset_input_buffer()
+            try:
+                self.serial_port.reset_input_buffer()
+            except AttributeError:
+                self.serial_port.flushInput()
+        except serial.serialutil.SerialException as e:
+            logerr("SerialException on drain: %s" % e)
+        self._last_read_ts = time.time()
+
+    def wait_command_delay(self):
+        """Wait until command_delay seconds have passed since the last read.
+
+        The inverter needs a short break between sending a response and
+        receiving the next command. Rather than sleeping for command_delay
+        seconds on every command only wait for whatever part of command_delay
+        has not already passed since the last response was read.
+        """
+
+        _delay = self.command_delay - (time.time() - self._last_read_ts)
+        if _delay > 0:
+            time.sleep(_delay)
 
     def send_cmd_with_crc(self, command, payload=None, globall=0,
                           address=2, max_tries=3):
@@ -1086,38 +1273,20 @@ class AuroraInverter(object):
             The decoded inverter response to the command as a Response Tuple.
         """
 
-        # get the applicable command codes etc
-        if self.commands[command]['sub'] is not None:
-            # we have a sub-command
-            command_t = (address, self.commands[command]['cmd'],
-                         self.commands[command]['sub'], globall)
-        elif payload is not None:
-            # we have no sub-command, but we have a payload
-            command_t = (address, self.commands[command]['cmd']) +  tuple([ord(b) for b in payload])
-        else:
-            # no sub-command or payload
-            command_t = (address, self.commands[command]['cmd'])
         # assemble our command
-        s = struct.Struct('%dB' % len(command_t))
-        _b = s.pack(*[b for b in command_t])
-        # pad the command to 8 bytes
-        _b_padded = self.pad(_b, 8)
-        # add the CRC
-        _data_with_crc = _b_padded + self.word2struct(self.crc16(_b_padded))
+        _data_with_crc = self.assemble_cmd(command, payload=payload,
+                                           globall=globall, address=address)
         # now send the assembled command retrying up to max_tries times
-        for count in xrange(max_tries):
-            logdbg2("send_cmd_with_crc: sent %s" % format_byte_to_hex(_data_with_crc))
+        for count in range(max_tries):
+            if weewx.debug >= 2:
+                logdbg2("send_cmd_with_crc: sent %s", format_byte_to_hex(_data_with_crc))
             try:
-                self.write(_data_with_crc)
-                # wait before reading
-                time.sleep(self.command_delay)
-                # look for the response
-                _resp = self.read_with_crc()
-                if self.commands[command]['fn'] is not None:
-                    return self.commands[command]['fn'](_resp)
-                else:
-                    return _resp
-            except weewx.CRCError:
+                _resp = self._try_command(_data_with_crc)
+            except weewx.WeeWxIOError:
+                pass
+            else:
+                if _resp is not None:
+                    return self.decode(command, _resp)
                 # We seem to get occasional CRC errors, once they start they
                 # continue indefinitely. Closing then opening the serial port
                 # seems to reset the error and allow proper communication to
@@ -1136,141 +1305,228 @@ class AuroraInverter(object):
                 else:
                     loginf("CRC error on try #%d." % (count + 1,))
                 continue
-            except weewx.WeeWxIOError:
-                pass
             if count + 1 < max_tries:
-                logdbg2("send_cmd_with_crc: try #%d unsuccessful... sleeping" % (count + 1,))
+                logdbg2("send_cmd_with_crc: try #%d unsuccessful... sleeping", count + 1)
                 time.sleep(self.wait_before_retry)
                 logdbg2("send_cmd_with_crc: retrying")
             else:
-                logdbg2("send_cmd_with_crc: try #%d unsuccessful" % (count + 1,))
+                logdbg2("send_cmd_with_crc: try #%d unsuccessful", count + 1)
         logdbg("Unable to send or receive data to/from the inverter")
         raise weewx.WeeWxIOError("Unable to send or receive data to/from the inverter")
 
+    def _try_command(self, frame):
+        """Make a single attempt at sending a command and reading the response.
+
+        Input:
+            frame: The assembled command with CRC to be sent. Bytes.
+
+        Returns:
+            The response with the CRC stripped or None if the response failed
+            the CRC check.
+        """
+
+        self.wait_command_delay()
+        self.write(frame)
+        # look for the response, read() will wait for the response until the
+        # port times out
+        return self.read_with_crc()
+
+    def send_cmd_batch(self, commands, globall=0, address=2, max_tries=3):
+        """Send a batch of commands with CRC and return the responses.
+
+        The assembled commands are written to the inverter back to back. The
+        responses are then read, CRC checked and decoded as they arrive with
+        no delay between reads. As the inverter replies to the first command
+        while later commands are still being written this requires a full
+        duplex link, on a half duplex RS-485 bus the replies and commands
+        collide. This is why batching is an option that is off by default. If
+        the batch fails for any reason (eg the inverter does not respond to
+        each command or a response fails the CRC check) all responses to the
+        batch are discarded and every command is sent again one at a time
+        using send_cmd_with_crc(). Responses do not identify the command they
+        answer so a missed response would otherwise shift every later
+        response onto the wrong command.
+
+        Inputs:
+            commands:   A sequence of inverter commands to be issued. Strings.
+            globall:
+            address:    The inverter address to be used, normally 2.
+            max_tries:  The maximum number of attempts to send each command
+                        if the batch fails and the commands are sent one at a
+                        time.
+
+        Returns:
+            A list of decoded inverter responses as Response Tuples in the
+            order the commands were given.
+        """
+
+        _data_with_crc = b''.join([self.assemble_cmd(c, globall=globall, address=address)
+                                   for c in commands])
+        if weewx.debug >= 2:
+            logdbg2("send_cmd_batch: sent %s", format_byte_to_hex(_data_with_crc))
+        _responses = []
+        _error = None
+        try:
+            self.wait_command_delay()
+            self.write(_data_with_crc)
+            # Read each response as soon as it arrives, read() blocks until
+            # the response is received or the port times out so there is no
+            # need to wait before reading.
+            for c in commands:
+                _resp = self.read_with_crc()
+                if _resp is None:
+                    _error = "response failed CRC check"
+                    break
+                _responses.append(self.decode(c, _resp))
+        except weewx.WeeWxIOError as e:
+            _error = e
+        if _error is None:
+            return _responses
+        loginf("Batch of %d commands failed after %d responses: %s. "
+               "Sending all commands individually." % (len(commands),
+                                                       len(_responses),
+                                                       _error))
+        # The batch failed. Responses do not identify the command they answer
+        # so if a response was missed any responses received may belong to
+        # other commands, discard them all. The inverter may still be
+        # responding to the rest of the batch so discard everything until the
+        # line is quiet then send each command on its own.
+        self.drain_input()
+        return [self.send_cmd_with_crc(c, globall=globall, address=address,
+                                       max_tries=max_tries)
+                for c in commands]
+
+    def assemble_cmd(self, command, payload=None, globall=0, address=2):
+        """Assemble a command with CRC ready to be sent to the inverter.
+
+        Inputs:
+            command:    The inverter command being issued. String.
+            payload:    Data to be sent to the inverter as part of the command.
+                        Will occupy part or all of bytes 2,3,4,5,6 and 7.
+                        Currently only used by setTime. String.
+            globall:
+            address:    The inverter address to be used, normally 2.
+
+        Returns:
+            A 10 byte string containing the padded command and CRC.
+        """
+
+        # Commands without a payload are the same every time they are issued
+        # so they are only assembled once and then taken from the cache.
+        if payload is None:
+            _key = (command, address, globall)
+            _frame = self._frame_cache.get(_key)
+            if _frame is not None:
+                return _frame
+        # get the applicable command codes etc and assemble the padded 8 byte
+        # command in our buffer
+        cmd, sub = COMMANDS[command][:2]
+        if sub is not None:
+            # we have a sub-command
+            _CMD_SUB_STRUCT.pack_into(self._tx_buf, 0, address, cmd, sub,
+                                      globall)
+        else:
+            # we have no sub-command, but we may have a payload
+            if payload is not None and len(payload) > 6:
+                raise DataFormatError("assemble_cmd: payload must be <= 6 characters in length")
+            _CMD_STRUCT.pack_into(self._tx_buf, 0, address, cmd,
+                                  payload if payload is not None else b'')
+        # add the CRC
+        _CRC_STRUCT.pack_into(self._tx_buf, 8, self.crc16(self._tx_buf[:8]))
+        _frame = bytes(self._tx_buf)
+        if payload is None:
+            self._frame_cache[_key] = _frame
+        return _frame
+
+    def decode(self, command, data):
+        """Decode an inverter response to a command.
+
+        Inputs:
+            command: The inverter command that was issued. String.
+            data:    The inverter response with the CRC stripped.
+
+        Returns:
+            The decoded response as a Response Tuple or if the command has no
+            decode function the undecoded response.
+        """
+
+        fn = COMMANDS[command][2]
+        if fn is not None:
+            return fn(data)
+        else:
+            return data
+
     def read_with_crc(self, bytes=8):
         """Read an inverter response with CRC and return the data.
 
         Read a response from the inverter, check the CRC and if valid strip the
-        CRC and return the data pay load.
+        CRC and return the data pay load. A response that fails the CRC check
+        is reported by returning None rather than raising an exception so the
+        caller can handle it without the cost of exception handling.
 
         Input:
             bytes: The number of bytes to be read.
 
         Returns:
-            A string of length bytes containing the data read from the
-            inverter.
+            A bytearray containing the data read from the inverter with the
+            CRC stripped or None if the response failed the CRC check.
         """
 
         # read the response
         _response = self.read(bytes=bytes)
-        # log the hex bytes received
-        logdbg2("read %s" % format_byte_to_hex(_response))
+        # log the hex bytes received, only format them if they will be logged
+        if weewx.debug >= 2:
+            logdbg2("read %s", format_byte_to_hex(_response))
         # check the CRC and strip out the pay load
-        return self.strip_crc16(_response)
+        return self.check_crc16(_response)
 
     @staticmethod
     def crc16(buf):
         """Calculate a CCITT CRC16 checksum of a series of bytes.
 
         Calculated as per the Checksum calculation section of the Aurora PV
-        Inverter Series Communications Protocol.
-
-        Use struct module to convert the input string to a sequence of bytes.
-        Could use bytearray but that was not introduced until python 2.6.
+        Inverter Series Communications Protocol. Rather than processing each
+        byte in python the CRC is calculated in C by binascii.crc_hqx() using
+        bit reversed input.
 
         Input:
             buf: string of binary packed data for which the CRC is to be
                  calculated
 
         Returns:
-            A two byte string containing the CRC.
+            The CRC as an integer.
         """
 
-        POLY = 0x8408
-        crc = 0xffff
-
-        # if our input is nothing then that is simple
-        if len(buf) == 0:
-            return ~crc & 0xffff
-
-        # Get a Struct object so we can unpack our input string. Our input
-        # could be of any length so construct our Struct format string based on
-        # the length of the input string.
-        _format = ''.join(['B' for b in range(len(buf))])
-        s = struct.Struct(_format)
-        # unpack the input string into our sequence of bytes
-        _bytes = s.unpack(buf)
-
-        # now calculate the CRC of our sequence of bytes
-        for _byte in _bytes:
-            for i in range(8):
-                if ((crc & 0x0001) ^ (_byte & 0x0001)):
-                    crc = ((crc >> 1) ^ POLY) & 0xffff
-                else:
-                    crc >>= 1
-                _byte >>= 1
-
-        return ~crc & 0xffff
+        crc = binascii.crc_hqx(bytearray(buf).translate(_BIT_REVERSE_TRANS), 0xffff)
+        # bit reverse the result and invert
+        return ~(_BIT_REVERSE[crc & 0xff] << 8 | _BIT_REVERSE[crc >> 8]) & 0xffff
 
     @staticmethod
-    def strip_crc16(buffer):
-        """Strip CRC bytes from an inverter response."""
-
-        # get the data payload
-        data = buffer[:-2]
-        # get the CRC bytes
-        crc_bytes = buffer[-2:]
-        # calculate the CRC of the received data
-        crc = AuroraInverter.word2struct(AuroraInverter.crc16(data))
-        # if our calculated CRC == received CRC then our data is valid and
-        # return it, otherwise raise a CRCError
-        if crc == crc_bytes:
-            return data
-        else:
-            logerr("Inverter response failed CRC check:")
-            logerr("  ***** response=%s" % (format_byte_to_hex(buffer)))
-            logerr("  *****     data=%s        CRC=%s  expected CRC=%s" %
-                       (format_byte_to_hex(data),
-                       format_byte_to_hex(crc_bytes),
-                       format_byte_to_hex(crc)))
-            raise weewx.CRCError("Inverter response failed CRC check")
-
-    @staticmethod
-    def word2struct(i):
-        """Take a 2 byte word and reverse the byte order.
+    def check_crc16(buffer):
+        """Check the CRC of an inverter response and strip the CRC bytes.
 
-        Input:
-            i: A 2 byte string containing the bytes to be processed.
+        The CRC of a response including its trailing CRC bytes is always the
+        same constant residue, so the response can be checked with a single
+        CRC calculation over the entire buffer.
 
         Returns:
-            A 2 byte string consisting of the input bytes but in reverse order.
+            The response with the CRC bytes stripped or None if the response
+            failed the CRC check.
         """
 
-        s = struct.Struct('2B')
-        b = s.pack(i & 0xff, i // 256)
-        return b
-
-    @staticmethod
-    def pad(buf, size):
-        """Pad a string with nulls.
-
-        Pad a string with nulls to make it a given size. If the string to be
-        padded is longer than size then an exception is raised.
-
-        Inputs:
-            buff: The string to be padded
-            size: The length of the padded string
-
-        Returns:
-            A padded string of length size.
-        """
-
-        PAD = ''.join(['\x00' for a in range(size)])
-
-        if size > len(PAD):
-            raise DataFormatError("pad: string to be padded must be <= %d characters in length" %
-                                      size)
-        return buf + PAD[:(size-len(buf))]
+        # if the CRC of the entire response is the residue then our data is
+        # valid and return it, otherwise log the failure and return None
+        if AuroraInverter.crc16(buffer) == _CRC_RESIDUE:
+            return buffer[:-2]
+        # calculate the CRC we expected for the log
+        crc = _CRC_STRUCT.pack(AuroraInverter.crc16(memoryview(buffer)[:-2]))
+        logerr("Inverter response failed CRC check:")
+        logerr("  ***** response=%s" % (format_byte_to_hex(buffer)))
+        logerr("  *****     data=%s        CRC=%s  expected CRC=%s" %
+                   (format_byte_to_hex(buffer[:-2]),
+                   format_byte_to_hex(buffer[-2:]),
+                   format_byte_to_hex(crc)))
+        return None
 
     @staticmethod
     def _dec_state(v):
@@ -1280,8 +1536,7 @@ class AuroraInverter(object):
         """
 
         try:
-            return ResponseTuple(ord(v[0]), ord(v[1]), (ord(v[2]),
-                                 ord(v[3]), ord(v[4]), ord(v[5])))
+            return ResponseTuple(v[0], v[1], (v[2], v[3], v[4], v[5]))
         except (IndexError, TypeError):
             return ResponseTuple(None, None, None)
 
@@ -1306,8 +1561,10 @@ class AuroraInverter(object):
             None and the data attribute is a 6 character ASCII string.
         """
 
+        # decode as latin-1 so that an unexpected non-ASCII byte cannot cause
+        # the response to be discarded
         try:
-            return ResponseTuple(None, None, str(v[0:6]))
+            return ResponseTuple(None, None, v[0:6].decode('latin-1'))
         except (IndexError, TypeError):
             return ResponseTuple(None, None, None)
 
@@ -1336,8 +1593,10 @@ class AuroraInverter(object):
             string.
         """
 
+        # decode as latin-1 so that an unexpected non-ASCII byte cannot cause
+        # the states to be discarded
         try:
-            return ResponseTuple(ord(v[0]), ord(v[1]), str(v[2:4]))
+            return ResponseTuple(v[0], v[1], v[2:4].decode('latin-1'))
         except (IndexError, TypeError):
             return ResponseTuple(None, None, None)
 
@@ -1380,9 +1639,8 @@ class AuroraInverter(object):
         """
 
         try:
-            return ResponseTuple(ord(v[0]), ord(v[1]),
-                                 struct.unpack('!f', v[2:])[0])
-        except (IndexError, TypeError):
+            return ResponseTuple(v[0], v[1], _F32_BE.unpack_from(v, 2)[0])
+        except (IndexError, TypeError, struct.error):
             return ResponseTuple(None, None, None)
 
     @staticmethod
@@ -1407,9 +1665,9 @@ class AuroraInverter(object):
         """
 
         try:
-            return ResponseTuple(ord(v[0]), ord(v[1]),
-                                 (int(v[2:4]), int(v[4:6])))
-        except (IndexError, TypeError):
+            return ResponseTuple(v[0], v[1], (int(v[2:4].decode('ascii')),
+                                             int(v[4:6].decode('ascii'))))
+        except (IndexError, TypeError, ValueError):
             return ResponseTuple(None, None, None)
 
     @staticmethod
@@ -1446,9 +1704,8 @@ class AuroraInverter(object):
         """
 
         try:
-            return ResponseTuple(ord(v[0]), ord(v[1]),
-                                 AuroraInverter._dec_int(v).data + 946648800)
-        except (IndexError, TypeError):
+            return ResponseTuple(v[0], v[1], _U32_BE.unpack_from(v, 2)[0] + 946648800)
+        except (IndexError, TypeError, struct.error):
             return ResponseTuple(None, None, None)
 
     @staticmethod
@@ -1480,9 +1737,8 @@ class AuroraInverter(object):
         """
 
         try:
-            _int = ord(v[2]) * 2**24 + ord(v[3]) * 2**16 + ord(v[4]) * 2**8 + ord(v[5])
-            return ResponseTuple(ord(v[0]), ord(v[1]), _int)
-        except (IndexError, TypeError):
+            return ResponseTuple(v[0], v[1], _U32_BE.unpack_from(v, 2)[0])
+        except (IndexError, TypeError, struct.error):
             return ResponseTuple(None, None, None)
 
     @staticmethod
@@ -1502,12 +1758,12 @@ class AuroraInverter(object):
             v: bytearray containing the 6 byte response
 
         Returns:
-            A ResponseTuple where the transmission and global attributes are
-            None and the data attribute is a 4 character ASCII string.
+            A ResponseTuple where the data attribute is the 4 undecoded data
+            bytes.
         """
 
         try:
-            return AuroraInverter._dec_ascii_and_state(v)
+            return ResponseTuple(v[0], v[1], bytes(v[2:6]))
         except (IndexError, TypeError):
             return ResponseTuple(None, None, None)
 
@@ -1533,12 +1789,68 @@ class AuroraInverter(object):
         """
 
         try:
-            _alarms = tuple([int(a) for a in v[2:6]])
-            return ResponseTuple(ord(v[0]), ord(v[1]), _alarms)
+            return ResponseTuple(v[0], v[1], tuple(v[2:6]))
         except (IndexError, TypeError):
             return ResponseTuple(None, None, None)
 
 
+# ============================================================================
+#                     Inverter command table and CRC residue
+# ============================================================================
+
+# The CRC of any valid frame including its trailing CRC bytes, used by
+# check_crc16() to check a response with a single CRC calculation.
+_CRC_RESIDUE = AuroraInverter.crc16(b'\x00\x00' +
+                                    _CRC_STRUCT.pack(AuroraInverter.crc16(b'\x00\x00')))
+
+
+# Commands that I know to obtain readings from the Aurora inverter. Listed
+# against each command is a tuple of the command code, sub-command code and
+# applicable decode function.
+COMMANDS = {
+    'getState':           (50, None, AuroraInverter._dec_state),
+    'getPartNumber':      (52, None, AuroraInverter._dec_ascii),
+    'getVersion':         (58, None, AuroraInverter._dec_ascii_and_state),
+    'getGridV':           (59,    1, AuroraInverter._dec_float),
+    'getGridC':           (59,    2, AuroraInverter._dec_float),
+    'getGridP':           (59,    3, AuroraInverter._dec_float),
+    'getFrequency':       (59,    4, AuroraInverter._dec_float),
+    'getBulkV':           (59,    5, AuroraInverter._dec_float),
+    'getLeakDcC':         (59,    6, AuroraInverter._dec_float),
+    'getLeakC':           (59,    7, AuroraInverter._dec_float),
+    'getStr1P':           (59,    8, AuroraInverter._dec_float),
+    'getStr2P':           (59,    9, AuroraInverter._dec_float),
+    'getInverterT':       (59,   21, AuroraInverter._dec_float),
+    'getBoosterT':        (59,   22, AuroraInverter._dec_float),
+    'getStr1V':           (59,   23, AuroraInverter._dec_float),
+    'getStr1C':           (59,   25, AuroraInverter._dec_float),
+    'getStr2V':           (59,   26, AuroraInverter._dec_float),
+    'getStr2C':           (59,   27, AuroraInverter._dec_float),
+    'getGridDcV':         (59,   28, AuroraInverter._dec_float),
+    'getGridDcFreq':      (59,   29, AuroraInverter._dec_float),
+    'getIsoR':            (59,   30, AuroraInverter._dec_float),
+    'getBulkDcV':         (59,   31, AuroraInverter._dec_float),
+    'getGridAvV':         (59,   32, AuroraInverter._dec_float),
+    'getBulkMidV':        (59,   33, AuroraInverter._dec_float),
+    'getGridNV':          (59,   34, AuroraInverter._dec_float),
+    'getDayPeakP':        (59,   35, AuroraInverter._dec_float),
+    'getPeakP':           (59,   36, AuroraInverter._dec_float),
+    'getGridNPhV':        (59,   38, AuroraInverter._dec_float),
+    'getSerialNumber':    (63, None, AuroraInverter._dec_ascii),
+    'getManufactureDate': (65, None, AuroraInverter._dec_week_year),
+    'getTimeDate':        (70, None, AuroraInverter._dec_ts),
+    'setTimeDate':        (71, None, AuroraInverter._dec_raw),
+    'getFirmwareRelease': (72, None, AuroraInverter._dec_ascii_and_state),
+    'getDayEnergy':       (78,    0, AuroraInverter._dec_int),
+    'getWeekEnergy':      (78,    1, AuroraInverter._dec_int),
+    'getMonthEnergy':     (78,    3, AuroraInverter._dec_int),
+    'getYearEnergy':      (78,    4, AuroraInverter._dec_int),
+    'getTotalEnergy':     (78,    5, AuroraInverter._dec_int),
+    'getPartialEnergy':   (78,    6, AuroraInverter._dec_int),
+    'getLastAlarms':      (86, None, AuroraInverter._dec_alarms)
+}
+
+
 # ============================================================================
 #                          Class AuroraConfEditor
 # ============================================================================
@@ -1558,6 +1870,12 @@ class AuroraConfEditor(weewx.drivers.AbstractConfEditor):
     # Serial port such as /dev/ttyS0, /dev/ttyUSB0, or /dev/cua0
     port = %s
 
+    # Send the commands used to obtain loop data to the inverter back to back
+    # rather than one command at a time. Only use this on a full duplex link
+    # (eg RS-232 or 4 wire RS-485/RS-422) or with an adapter that buffers the
+    # commands, not on a 2 wire half duplex RS-485 bus. True or False.
+    #batch_commands = False
+
     # The driver to use:
     driver = user.aurora
 
@@ -1568,7 +1886,7 @@ class AuroraConfEditor(weewx.drivers.AbstractConfEditor):
     # On startup the AuroraDriver derives the aurora readings to use to
     # construct the AuroraDriver loop packets from the aurora readings included
     # in the [[FieldMap]]. All aurora readings included in the [[FieldMap]]
-    # must be a key from the user.aurora.AuroraInverter.commands dict.
+    # must be a key from the user.aurora.COMMANDS dict.
     #[[FieldMap]]
 %s
 """ % (AuroraInverter.DEFAULT_PORT,
@@ -1576,18 +1894,18 @@ class AuroraConfEditor(weewx.drivers.AbstractConfEditor):
 
     def prompt_for_settings(self):
 
-        print "Specify the inverter model, for example: Aurora PVI-6000 or Aurora PVI-6000"
+        print("Specify the inverter model, for example: Aurora PVI-6000 or Aurora PVI-6000")
         model = self._prompt('model', 'Aurora PVI-6000')
-        print "Specify the serial port on which the inverter is connected, for"
-        print "example: /dev/ttyUSB0 or /dev/ttyS0 or /dev/cua0."
+        print("Specify the serial port on which the inverter is connected, for")
+        print("example: /dev/ttyUSB0 or /dev/ttyS0 or /dev/cua0.")
         port = self._prompt('port', AuroraInverter.DEFAULT_PORT)
         return {'model': model,
                 'port': port}
 
     def modify_config(self, config_dict):
 
-        print """
-Setting record_generation to software."""
+        print("""
+Setting record_generation to software.""")
         config_dict['StdArchive']['record_generation'] = 'software'
 
 
@@ -1607,7 +1925,27 @@ def format_byte_to_hex(bytes):
         sequence.
     """
 
-    return ' '.join(['%02X' % ord(b) for b in bytes])
+    _hex = binascii.hexlify(bytearray(bytes)).decode().upper()
+    return ' '.join([_hex[i:i + 2] for i in range(0, len(_hex), 2)])
+
+
+def lookup(table, code, default=None):
+    """Look up a state code in a state code lookup table.
+
+    Inputs:
+        table:   A state code lookup table, eg GLOBAL_TBL.
+        code:    The state code to look up. Integer, may be None.
+        default: The value to return if code is not in the table.
+
+    Returns:
+        The table entry for code or default if code is not in the table.
+    """
+
+    if code is not None and 0 <= code < len(table):
+        _value = table[code]
+        if _value is not None:
+            return _value
+    return default
 
 # ============================================================================
 #                            class ResponseTuple
@@ -1641,22 +1979,8 @@ def format_byte_to_hex(bytes):
 # It is also valid to have a data attribute of None. In these cases the data
 # could not be decoded and the driver will handle this appropriately.
 
-class ResponseTuple(tuple):
-
-    def __new__(cls, *args):
-        return tuple.__new__(cls, args)
-
-    @property
-    def transmission_state(self):
-        return self[0]
-
-    @property
-    def global_state(self):
-        return self[1]
-
-    @property
-    def data(self):
-        return self[2]
+ResponseTuple = collections.namedtuple('ResponseTuple',
+                                       ['transmission_state', 'global_state', 'data'])
 
 
 # ============================================================================
@@ -1722,12 +2046,12 @@ if __name__ == '__main__':
     (options, args) = parser.parse_args()
 
     if options.version:
-        print "Aurora driver version %s" % DRIVER_VERSION
+        print("Aurora driver version %s" % DRIVER_VERSION)
         exit(0)
 
     # get config_dict to use
     config_path, config_dict = weecfg.read_config(options.config_path, args)
-    print "Using configuration file %s" % config_path
+    print("Using configuration file %s" % config_path)
 
     # get a config dict for the inverter
     aurora_dict = config_dict.get('Aurora', None)
@@ -1741,120 +2065,120 @@ if __name__ == '__main__':
     if options.gen:
         while True:
             for packet in inverter.genLoopPackets():
-                print "LOOP:  ", timestamp_to_string(packet['dateTime']), sort(packet)
+                print("LOOP:  ", timestamp_to_string(packet['dateTime']), sort(packet))
     elif options.status:
         response_rt = inverter.do_cmd('getState')
-        print
-        print "%s Status:" % inverter.model
+        print()
+        print("%s Status:" % inverter.model)
         if response_rt.transmission_state is not None:
-            print "%22s: %d (%s)" % ("Transmission state",
-                                     response_rt.transmission_state,
-                                     AuroraDriver.TRANSMISSION[response_rt.transmission_state])
+            print("%22s: %d (%s)" % ("Transmission state",
+                                      response_rt.transmission_state,
+                                      lookup(TRANSMISSION_TBL, response_rt.transmission_state)))
         else:
-            print "Transmission state: None (---)"
+            print("Transmission state: None (---)")
         if response_rt.global_state is not None:
-            print "%22s: %d (%s)" % ("Global state",
-                                     response_rt.global_state,
-                                     AuroraDriver.GLOBAL[response_rt.global_state])
+            print("%22s: %d (%s)" % ("Global state",
+                                      response_rt.global_state,
+                                      lookup(GLOBAL_TBL, response_rt.global_state)))
         else:
-            print "      Global state: None (---)"
+            print("      Global state: None (---)")
         if response_rt.data is not None and response_rt.data[0] is not None:
-            print "%22s: %d (%s)" % ("Inverter state",
-                                     response_rt.data[0],
-                                     AuroraDriver.INVERTER[response_rt.data[0]])
+            print("%22s: %d (%s)" % ("Inverter state",
+                                      response_rt.data[0],
+                                      lookup(INVERTER_TBL, response_rt.data[0])))
         else:
-            print "    Inverter state: None (---)"
+            print("    Inverter state: None (---)")
         if response_rt.data is not None and response_rt.data[1] is not None:
-            print "%22s: %d (%s)" % ("DcDc1 state",
-                                     response_rt.data[1],
-                                     AuroraDriver.DCDC[response_rt.data[1]])
+            print("%22s: %d (%s)" % ("DcDc1 state",
+                                      response_rt.data[1],
+                                      lookup(DCDC_TBL, response_rt.data[1])))
         else:
-            print "       DcDc1 state: None (---)"
+            print("       DcDc1 state: None (---)")
         if response_rt.data is not None and response_rt.data[2] is not None:
-            print "%22s: %d (%s)" % ("DcDc2 state",
-                                     response_rt.data[2],
-                                     AuroraDriver.DCDC[response_rt.data[2]])
+            print("%22s: %d (%s)" % ("DcDc2 state",
+                                      response_rt.data[2],
+                                      lookup(DCDC_TBL, response_rt.data[2])))
         else:
-            print "       DcDc2 state: None (---)"
+            print("       DcDc2 state: None (---)")
         if response_rt.data is not None and response_rt.data[3] is not None:
-            print "%22s: %d (%s)[%s]" % ("Alarm state",
-                                         response_rt.data[3],
-                                         AuroraDriver.ALARM[response_rt.data[3]]['description'],
-                                         AuroraDriver.ALARM[response_rt.data[3]]['code'])
+            print("%22s: %d (%s)[%s]" % ("Alarm state",
+                                          response_rt.data[3],
+                                          lookup(ALARM_DESC_TBL, response_rt.data[3]),
+                                          lookup(ALARM_CODE_TBL, response_rt.data[3])))
         else:
-            print "       Alarm state: None (---)"
+            print("       Alarm state: None (---)")
 
     elif options.info:
-        print
-        print "%s Information:" % inverter.model
-        print "%21s: %s" % ("Part Number", inverter.part_number)
-        print "%21s: %s" % ("Version", inverter.version)
-        print "%21s: %s" % ("Serial Number", inverter.serial_number)
-        print "%21s: %s" % ("Manufacture Date", inverter.manufacture_date)
-        print "%21s: %s" % ("Firmware Release", inverter.firmware_rel)
+        print()
+        print("%s Information:" % inverter.model)
+        print("%21s: %s" % ("Part Number", inverter.part_number))
+        print("%21s: %s" % ("Version", inverter.version))
+        print("%21s: %s" % ("Serial Number", inverter.serial_number))
+        print("%21s: %s" % ("Manufacture Date", inverter.manufacture_date))
+        print("%21s: %s" % ("Firmware Release", inverter.firmware_rel))
     elif options.readings:
-        print
-        print "%s Current Readings:" % inverter.model
-        print '-----------------------------------------------'
-        print "Grid:"
-        print "%29s: %sV" % ('Voltage', inverter.do_cmd('getGridV').data)
-        print "%29s: %sA" % ('Current', inverter.do_cmd('getGridC').data)
-        print "%29s: %sW" % ('Power', inverter.do_cmd('getGridP').data)
-        print "%29s: %sHz" % ('Frequency', inverter.do_cmd('getFrequency').data)
-        print "%29s: %sV" % ('Average Voltage', inverter.do_cmd('getGridAvV').data)
-        print "%29s: %sV" % ('Neutral Voltage', inverter.do_cmd('getGridNV').data)
-        print "%29s: %sV" % ('Neutral Phase Voltage', inverter.do_cmd('getGridNPhV').data)
-        print '-----------------------------------------------'
-        print "String 1:"
-        print "%29s: %sV" % ('Voltage', inverter.do_cmd('getStr1V').data)
-        print "%29s: %sA" % ('Current', inverter.do_cmd('getStr1C').data)
-        print "%29s: %sW" % ('Power', inverter.do_cmd('getStr1P').data)
-        print '-----------------------------------------------'
-        print "String 2:"
-        print "%29s: %sV" % ('Voltage', inverter.do_cmd('getStr2V').data)
-        print "%29s: %sA" % ('Current', inverter.do_cmd('getStr2C').data)
-        print "%29s: %sW" % ('Power', inverter.do_cmd('getStr2P').data)
-        print '-----------------------------------------------'
-        print "Inverter:"
-        print "%29s: %sV" % ('Voltage (DC/DC Booster)', inverter.do_cmd('getGridDcV').data)
-        print "%29s: %sHz" % ('Frequency (DC/DC Booster)', inverter.do_cmd('getGridDcFreq').data)
-        print "%29s: %sC" % ('Inverter Temp', inverter.do_cmd('getInverterT').data)
-        print "%29s: %sC" % ('Booster Temp', inverter.do_cmd('getBoosterT').data)
-        print "%29s: %sW" % ("Today's Peak Power", inverter.do_cmd('getDayPeakP').data)
-        print "%29s: %sW" % ("Lifetime Peak Power", inverter.do_cmd('getPeakP').data)
-        print "%29s: %sWh" % ("Today's Energy", inverter.do_cmd('getDayEnergy').data)
-        print "%29s: %sWh" % ("This Weeks's Energy", inverter.do_cmd('getWeekEnergy').data)
-        print "%29s: %sWh" % ("This Month's Energy", inverter.do_cmd('getMonthEnergy').data)
-        print "%29s: %sWh" % ("This Year's Energy", inverter.do_cmd('getYearEnergy').data)
-        print "%29s: %sWh" % ("Partial Energy", inverter.do_cmd('getPartialEnergy').data)
-        print "%29s: %sWh" % ("Lifetime Energy", inverter.do_cmd('getTotalEnergy').data)
-        print
-        print "%29s: %sV" % ('Bulk Voltage', inverter.do_cmd('getBulkV').data)
-        print "%29s: %sV" % ('Bulk DC Voltage', inverter.do_cmd('getBulkDcV').data)
-        print "%29s: %sV" % ('Bulk Mid Voltage', inverter.do_cmd('getBulkMidV').data)
-        print
-        print "%29s: %sMOhms" % ('Insulation Resistance', inverter.do_cmd('getIsoR').data)
-        print
-        print "%29s: %sA" % ('Leakage Current(Inverter)', inverter.do_cmd('getLeakC').data)
-        print "%29s: %sA" % ('Leakage Current(Booster)', inverter.do_cmd('getLeakDcC').data)
+        print()
+        print("%s Current Readings:" % inverter.model)
+        print('-----------------------------------------------')
+        print("Grid:")
+        print("%29s: %sV" % ('Voltage', inverter.do_cmd('getGridV').data))
+        print("%29s: %sA" % ('Current', inverter.do_cmd('getGridC').data))
+        print("%29s: %sW" % ('Power', inverter.do_cmd('getGridP').data))
+        print("%29s: %sHz" % ('Frequency', inverter.do_cmd('getFrequency').data))
+        print("%29s: %sV" % ('Average Voltage', inverter.do_cmd('getGridAvV').data))
+        print("%29s: %sV" % ('Neutral Voltage', inverter.do_cmd('getGridNV').data))
+        print("%29s: %sV" % ('Neutral Phase Voltage', inverter.do_cmd('getGridNPhV').data))
+        print('-----------------------------------------------')
+        print("String 1:")
+        print("%29s: %sV" % ('Voltage', inverter.do_cmd('getStr1V').data))
+        print("%29s: %sA" % ('Current', inverter.do_cmd('getStr1C').data))
+        print("%29s: %sW" % ('Power', inverter.do_cmd('getStr1P').data))
+        print('-----------------------------------------------')
+        print("String 2:")
+        print("%29s: %sV" % ('Voltage', inverter.do_cmd('getStr2V').data))
+        print("%29s: %sA" % ('Current', inverter.do_cmd('getStr2C').data))
+        print("%29s: %sW" % ('Power', inverter.do_cmd('getStr2P').data))
+        print('-----------------------------------------------')
+        print("Inverter:")
+        print("%29s: %sV" % ('Voltage (DC/DC Booster)', inverter.do_cmd('getGridDcV').data))
+        print("%29s: %sHz" % ('Frequency (DC/DC Booster)', inverter.do_cmd('getGridDcFreq').data))
+        print("%29s: %sC" % ('Inverter Temp', inverter.do_cmd('getInverterT').data))
+        print("%29s: %sC" % ('Booster Temp', inverter.do_cmd('getBoosterT').data))
+        print("%29s: %sW" % ("Today's Peak Power", inverter.do_cmd('getDayPeakP').data))
+        print("%29s: %sW" % ("Lifetime Peak Power", inverter.do_cmd('getPeakP').data))
+        print("%29s: %sWh" % ("Today's Energy", inverter.do_cmd('getDayEnergy').data))
+        print("%29s: %sWh" % ("This Weeks's Energy", inverter.do_cmd('getWeekEnergy').data))
+        print("%29s: %sWh" % ("This Month's Energy", inverter.do_cmd('getMonthEnergy').data))
+        print("%29s: %sWh" % ("This Year's Energy", inverter.do_cmd('getYearEnergy').data))
+        print("%29s: %sWh" % ("Partial Energy", inverter.do_cmd('getPartialEnergy').data))
+        print("%29s: %sWh" % ("Lifetime Energy", inverter.do_cmd('getTotalEnergy').data))
+        print()
+        print("%29s: %sV" % ('Bulk Voltage', inverter.do_cmd('getBulkV').data))
+        print("%29s: %sV" % ('Bulk DC Voltage', inverter.do_cmd('getBulkDcV').data))
+        print("%29s: %sV" % ('Bulk Mid Voltage', inverter.do_cmd('getBulkMidV').data))
+        print()
+        print("%29s: %sMOhms" % ('Insulation Resistance', inverter.do_cmd('getIsoR').data))
+        print()
+        print("%29s: %sA" % ('Leakage Current(Inverter)', inverter.do_cmd('getLeakC').data))
+        print("%29s: %sA" % ('Leakage Current(Booster)', inverter.do_cmd('getLeakDcC').data))
 
     elif options.get_time:
         inverter_ts = inverter.getTime()
         _error = inverter_ts - time.time()
-        print
-        print "Inverter date-time is %s" % (timestamp_to_string(inverter_ts))
-        print "    Clock error is %.3f seconds (positive is fast)" % _error
+        print()
+        print("Inverter date-time is %s" % (timestamp_to_string(inverter_ts)))
+        print("    Clock error is %.3f seconds (positive is fast)" % _error)
     elif options.set_time:
         inverter_ts = inverter.getTime()
         _error = inverter_ts - time.time()
-        print
-        print "Current inverter date-time is %s" % (timestamp_to_string(inverter_ts))
-        print "    Clock error is %.3f seconds (positive is fast)" % _error
-        print
-        print "Setting time..."
+        print()
+        print("Current inverter date-time is %s" % (timestamp_to_string(inverter_ts)))
+        print("    Clock error is %.3f seconds (positive is fast)" % _error)
+        print()
+        print("Setting time...")
         inverter.setTime()
         inverter_ts = inverter.getTime()
         _error = inverter_ts - time.time()
-        print
-        print "Updated inverter date-time is %s" % (timestamp_to_string(inverter_ts))
-        print "    Clock error is %.3f seconds (positive is fast)" % _error
+        print()
+        print("Updated inverter date-time is %s" % (timestamp_to_string(inverter_ts)))
+        print("    Clock error is %.3f seconds (positive is fast)" % _error)